@@ -1,51 +1,338 @@
 """
 Pytest configuration and fixtures
 """
+import httpx
+import orjson
 import pytest
-import requests
 import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 
 
-# Base URL for the API
-BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8080")
+def _split(value):
+    """Split a comma-separated environment value into a tuple of names"""
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+@dataclass(frozen=True)
+class Config:
+    """Test settings, read from the environment once at import"""
+    # Base URL for the API
+    base_url: str = os.getenv("API_BASE_URL", "http://localhost:8080")
+    # Per-request timeout in seconds; render endpoints on large databases are slow
+    timeout: float = float(os.getenv("API_TIMEOUT", "120"))
+    # Databases and tables under test; both accept comma-separated lists.
+    # This should be configured based on your ClickHouse setup
+    databases: tuple = _split(os.getenv("TEST_DATABASE", "owl"))
+    tables: tuple = _split(os.getenv("TEST_TABLE", "sflows"))
+
+
+CONFIG = Config()
+
+
+def _json(response):
+    """Decode a response body with orjson (faster than the stdlib json module)"""
+    return orjson.loads(response.content)
+
+
+# Contract checks take a cached (response, data) pair and assert one slice of
+# an endpoint's contract; test modules hold the endpoint-specific ones.
+def _check_json_content_type(response, data):
+    """Response is served as JSON"""
+    assert response.headers.get("Content-Type", "").startswith("application/json")
+
+
+@pytest.fixture(scope="session")
+def check_json_content_type():
+    """Return the content-type check shared by every endpoint contract"""
+    return _check_json_content_type
 
 
 @pytest.fixture(scope="session")
 def api_base_url():
     """Return the base URL for the API"""
-    return BASE_URL
+    return CONFIG.base_url
 
 
 @pytest.fixture(scope="session")
 def api_client():
-    """Create a requests session for API testing"""
-    session = requests.Session()
-    session.headers.update({"Content-Type": "application/json"})
-    return session
+    """Create an HTTP/2-capable httpx client for API testing"""
+    # Large keep-alive pool shared by the prefetch threads; retries cover
+    # transient connection failures
+    transport = httpx.HTTPTransport(
+        http2=True,
+        retries=2,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+    )
+    client = httpx.Client(
+        transport=transport,
+        headers={"Content-Type": "application/json"},
+        timeout=CONFIG.timeout,
+        follow_redirects=True,
+    )
+    yield client
+    client.close()
 
 
 @pytest.fixture(scope="session")
-def test_database():
+def test_database(test_target):
     """Return a test database name that should exist in ClickHouse"""
-    # This should be configured based on your ClickHouse setup
-    return os.getenv("TEST_DATABASE", "owl")
+    return test_target[0]
 
 
 @pytest.fixture(scope="session")
-def test_table():
+def test_table(test_target):
     """Return a test table name that should exist in the test database"""
-    return os.getenv("TEST_TABLE", "sflows")
+    return test_target[1]
+
+
+@pytest.fixture(scope="session")
+def urls(api_base_url, test_database, test_table):
+    """Return the endpoint URLs under test, keyed by endpoint name"""
+    base = api_base_url
+    return {
+        "databases": f"{base}/api/databases",
+        "render_databases": f"{base}/api/render/databases",
+        "table_details": f"{base}/api/table/{test_database}/{test_table}",
+        "table_relationships": f"{base}/api/table/{test_database}/{test_table}/relationships",
+        "render_schema": f"{base}/api/render/schema/{test_database}/{test_table}",
+        "db_schema": f"{base}/api/render/database/{test_database}/schema",
+        "db_stats": f"{base}/api/render/database/{test_database}/stats",
+        # Error paths
+        "table_details_missing_database": f"{base}/api/table//{test_table}",
+        "table_details_missing_table": f"{base}/api/table/{test_database}/",
+        "table_details_nonexistent": (
+            f"{base}/api/table/{test_database}/nonexistent_table_xyz_12345"
+        ),
+        "table_relationships_missing_params": f"{base}/api/table//relationships",
+        "render_schema_missing_params": f"{base}/api/render/schema//",
+        "db_schema_missing_database": f"{base}/api/render/database//schema",
+        "db_stats_missing_database": f"{base}/api/render/database//stats",
+    }
+
+
+@pytest.fixture(scope="session")
+def prepared(api_client, urls):
+    """Return a prebuilt GET request for every endpoint, keyed by endpoint name"""
+    return {name: api_client.build_request("GET", url) for name, url in urls.items()}
+
+
+def _send_cached(client, request, cache):
+    """Send a request, reusing the session's earlier response for the same URL
+
+    Responses carrying an ETag are revalidated with If-None-Match and reused
+    on 304 Not Modified. Responses without one are reused as-is, since the
+    schema under test does not change during a session.
+    """
+    url = str(request.url)
+    cached = cache.get(url)
+    if cached is not None:
+        etag = cached.headers.get("ETag")
+        if etag is None:
+            return cached
+        # Revalidate with a copy so the shared prepared request stays a plain GET
+        request = client.build_request(
+            "GET", request.url, headers={**request.headers, "If-None-Match": etag}
+        )
+    response = client.send(request)
+    if cached is not None and response.status_code == 304:
+        return cached
+    cache[url] = response
+    return response
+
+
+@pytest.fixture(scope="session")
+def response_cache():
+    """Return the session-wide response cache, keyed by URL"""
+    return {}
+
+
+class PrefetchedResponses:
+    """Endpoint responses keyed by endpoint name, each fetched in the background
+
+    Every endpoint is fetched at most once, the first time it is prefetched or
+    read. A failed fetch re-raises only when that endpoint is read, so one slow
+    or broken endpoint fails just the tests that depend on it.
+    """
+
+    def __init__(self, executor, client, requests, cache):
+        self._executor = executor
+        self._client = client
+        self._requests = requests
+        self._cache = cache
+        self._futures = {}
+        self._parsed = {}
+
+    def _future(self, name):
+        if name not in self._futures:
+            self._futures[name] = self._executor.submit(
+                _send_cached, self._client, self._requests[name], self._cache
+            )
+        return self._futures[name]
+
+    def prefetch(self, names):
+        """Start fetching the given endpoints concurrently"""
+        for name in names:
+            self._future(name)
+
+    def __getitem__(self, name):
+        return self._future(name).result()
+
+    def parsed(self, name):
+        """Return an endpoint's (response, parsed JSON) pair, decoding it once"""
+        if name not in self._parsed:
+            response = self[name]
+            self._parsed[name] = response, _json(response)
+        return self._parsed[name]
+
 
+# Session-scoped fixtures serving one endpoint's response, keyed to that endpoint
+RESPONSE_FIXTURES = {
+    "databases_response": "databases",
+    "table_details_response": "table_details",
+    "table_relationships_response": "table_relationships",
+    "render_databases_response": "render_databases",
+    "render_schema_response": "render_schema",
+    "database_schema_response": "db_schema",
+    "database_stats_response": "db_stats",
+}
 
-@pytest.fixture
-def verify_api_available(api_base_url, api_client):
-    """Verify that the API is available before running tests"""
+
+def _endpoints_needed(items):
+    """Return the endpoints the given tests read through fixtures or parameters"""
+    names = set()
+    for item in items:
+        names.update(
+            RESPONSE_FIXTURES[name] for name in item.fixturenames
+            if name in RESPONSE_FIXTURES
+        )
+        callspec = getattr(item, "callspec", None)
+        if callspec is not None and "endpoint" in callspec.params:
+            names.add(callspec.params["endpoint"])
+    return names
+
+
+@pytest.fixture(scope="session")
+def prefetched_responses(request, api_client, prepared, response_cache):
+    """Fetch the endpoints this session's tests need concurrently on first use"""
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = PrefetchedResponses(executor, api_client, prepared, response_cache)
+        # An xdist worker runs only a slice of the collected tests, so it
+        # fetches each endpoint when one of its tests first reads it
+        if not hasattr(request.config, "workerinput"):
+            responses.prefetch(_endpoints_needed(request.session.items))
+        yield responses
+
+
+# Cached endpoint responses: each endpoint is served from the prefetched
+# responses as a (response, parsed JSON) tuple.
+@pytest.fixture(scope="session")
+def databases_response(prefetched_responses):
+    """GET /api/databases"""
+    return prefetched_responses.parsed("databases")
+
+
+@pytest.fixture(scope="session")
+def table_details_response(prefetched_responses):
+    """GET /api/table/:database/:table"""
+    return prefetched_responses.parsed("table_details")
+
+
+@pytest.fixture(scope="session")
+def table_relationships_response(prefetched_responses):
+    """GET /api/table/:database/:table/relationships"""
+    return prefetched_responses.parsed("table_relationships")
+
+
+@pytest.fixture(scope="session")
+def render_databases_response(prefetched_responses):
+    """GET /api/render/databases"""
+    return prefetched_responses.parsed("render_databases")
+
+
+@pytest.fixture(scope="session")
+def render_schema_response(prefetched_responses):
+    """GET /api/render/schema/:database/:table"""
+    return prefetched_responses.parsed("render_schema")
+
+
+@pytest.fixture(scope="session")
+def database_schema_response(prefetched_responses):
+    """GET /api/render/database/:database/schema"""
+    return prefetched_responses.parsed("db_schema")
+
+
+@pytest.fixture(scope="session")
+def database_stats_response(prefetched_responses):
+    """GET /api/render/database/:database/stats"""
+    return prefetched_responses.parsed("db_stats")
+
+
+def pytest_sessionstart(session):
+    """Verify once, before any test runs, that the API is available"""
+    # xdist workers inherit the controller's verdict; collect-only needs no server
+    if hasattr(session.config, "workerinput") or session.config.option.collectonly:
+        return
     try:
-        response = api_client.get(f"{api_base_url}/api/render/databases", timeout=5)
-        if response.status_code != 200:
-            pytest.skip("API server is not available or not responding correctly")
-    except requests.exceptions.RequestException:
-        pytest.skip("API server is not available")
+        response = httpx.get(f"{CONFIG.base_url}/api/render/databases", timeout=5)
+    except httpx.HTTPError:
+        pytest.exit("API server is not available", returncode=0)
+    if response.status_code != 200:
+        pytest.exit("API server is not responding correctly", returncode=0)
+
+
+@lru_cache(maxsize=None)
+def _test_targets():
+    """Pair configured databases with tables; a single database applies to every table"""
+    databases, tables = CONFIG.databases, CONFIG.tables
+    if not databases or not tables:
+        raise pytest.UsageError("TEST_DATABASE and TEST_TABLE must not be empty")
+    if len(databases) == 1:
+        databases = databases * len(tables)
+    if len(databases) != len(tables):
+        raise pytest.UsageError(
+            "TEST_DATABASE and TEST_TABLE must list the same number of entries"
+        )
+    return tuple(zip(databases, tables))
+
+
+def pytest_generate_tests(metafunc):
+    """Run every test that depends on a database/table once per configured target"""
+    if "test_target" in metafunc.fixturenames:
+        targets = _test_targets()
+        metafunc.parametrize(
+            "test_target",
+            targets,
+            ids=[f"{database}.{table}" for database, table in targets],
+            scope="session",
+        )
+
+
+def _target_index(item):
+    """Return the position of the item's test target, or -1 if it has none"""
+    callspec = getattr(item, "callspec", None)
+    if callspec is None or "test_target" not in callspec.params:
+        return -1
+    return _test_targets().index(callspec.params["test_target"])
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_collection_modifyitems(config, items):
+    """Group tests by target and, with several databases, by xdist worker"""
+    # Marks must be in place before xdist reads them to assign groups; a single
+    # database would put every test in one group, so only mark when it helps
+    if len({database for database, _ in _test_targets()}) > 1:
+        for item in items:
+            callspec = getattr(item, "callspec", None)
+            if callspec is not None and "test_target" in callspec.params:
+                database, _ = callspec.params["test_target"]
+                item.add_marker(pytest.mark.xdist_group(name=database))
+    original = {id(item): index for index, item in enumerate(items)}
+    yield
+    # pytest's own reordering of the session-scoped test_target interleaves
+    # modules and parameters; restore collection order within each target
+    items.sort(key=lambda item: (_target_index(item), original[id(item)]))
 
 
 def pytest_configure(config):
@@ -1,198 +1,161 @@
 """
 Tests for Clean JSON API endpoints (matching API.md specification)
 """
+import fastjsonschema
 import pytest
 
 
-@pytest.mark.integration
-@pytest.mark.clean_api
-class TestCleanAPIDatabases:
-    """Tests for GET /api/databases endpoint"""
-    
-    def test_get_databases_returns_200(self, api_base_url, api_client, verify_api_available):
-        """Test that GET /api/databases returns 200 OK"""
-        response = api_client.get(f"{api_base_url}/api/databases")
-        assert response.status_code == 200
-    
-    def test_get_databases_returns_json(self, api_base_url, api_client, verify_api_available):
-        """Test that GET /api/databases returns valid JSON"""
-        response = api_client.get(f"{api_base_url}/api/databases")
-        assert response.headers["Content-Type"].startswith("application/json")
-        data = response.json()
-        assert isinstance(data, dict)
-    
-    def test_get_databases_structure(self, api_base_url, api_client, verify_api_available):
-        """Test that databases response has correct structure"""
-        response = api_client.get(f"{api_base_url}/api/databases")
-        data = response.json()
-        
-        # Should be a dict where keys are database names
-        assert isinstance(data, dict)
-        
-        # Each database should have a list of tables
-        for db_name, tables in data.items():
-            assert isinstance(db_name, str)
-            assert isinstance(tables, list)
-            
-            # Each table should have the correct structure
-            for table in tables:
-                assert isinstance(table, dict)
-                assert "name" in table
-                assert "type" in table
-                assert isinstance(table["name"], str)
-                assert isinstance(table["type"], str)
-                
-                # Optional fields
-                if "rows" in table and table["rows"] is not None:
-                    assert isinstance(table["rows"], int)
-                if "size" in table and table["size"] != "":
-                    assert isinstance(table["size"], str)
-    
-    def test_get_databases_not_empty(self, api_base_url, api_client, verify_api_available):
-        """Test that databases list is not empty (assumes test data exists)"""
-        response = api_client.get(f"{api_base_url}/api/databases")
-        data = response.json()
-        assert len(data) > 0, "Expected at least one database"
+# Schema for one entry of a table's columns, compiled once at import
+validate_column = fastjsonschema.compile({
+    "type": "object",
+    "required": ["name", "type"],
+    "properties": {
+        "name": {"type": "string"},
+        "type": {"type": "string"},
+        "default_kind": {"type": "string"},
+        "default_expression": {"type": "string"},
+        "comment": {"type": "string"},
+        "codec_expression": {"type": "string"},
+        "ttl_expression": {"type": "string"},
+    },
+})
+
+
+def check_databases_structure(response, data):
+    """Databases response maps database names to lists of tables"""
+    # Should be a dict where keys are database names
+    assert isinstance(data, dict)
+
+    # Each database should have a list of tables
+    for db_name, tables in data.items():
+        assert isinstance(db_name, str)
+        assert isinstance(tables, list)
+
+        # Each table should have the correct structure
+        for table in tables:
+            assert isinstance(table, dict)
+            assert "name" in table
+            assert "type" in table
+            assert isinstance(table["name"], str)
+            assert isinstance(table["type"], str)
+
+            # Optional fields
+            if "rows" in table and table["rows"] is not None:
+                assert isinstance(table["rows"], int)
+            if "size" in table and table["size"] != "":
+                assert isinstance(table["size"], str)
+
+
+def check_databases_not_empty(response, data):
+    """Databases list is not empty (assumes test data exists)"""
+    assert len(data) > 0, "Expected at least one database"
+
+
+def check_table_details_structure(response, data):
+    """Table details have metadata and columns"""
+    # Should be a dict with table metadata
+    assert isinstance(data, dict)
+
+    # Required fields
+    assert "name" in data
+    assert "database" in data
+    assert "engine" in data
+    assert "columns" in data
+
+    # Validate metadata fields
+    assert isinstance(data["name"], str)
+    assert isinstance(data["database"], str)
+    assert isinstance(data["engine"], str)
+
+    # Validate columns array
+    assert isinstance(data["columns"], list)
+    assert len(data["columns"]) > 0, "Expected at least one column"
+
+    for column in data["columns"]:
+        validate_column(column)
+
+
+def check_table_relationships_structure(response, data):
+    """Relationships are a list of typed source/target pairs"""
+    assert isinstance(data, list)
+
+    for relationship in data:
+        assert isinstance(relationship, dict)
+        assert "source_table" in relationship
+        assert "source_database" in relationship
+        assert "target_table" in relationship
+        assert "target_database" in relationship
+        assert "relationship_type" in relationship
+
+        assert isinstance(relationship["source_table"], str)
+        assert isinstance(relationship["source_database"], str)
+        assert isinstance(relationship["target_table"], str)
+        assert isinstance(relationship["target_database"], str)
+        assert isinstance(relationship["relationship_type"], str)
+
+        # Relationship type should be one of the expected values
+        assert relationship["relationship_type"] in [
+            "depends_on", "depended_on_by"
+        ]
+
+
+DATABASES_CHECKS = {
+    "structure": check_databases_structure,
+    "not_empty": check_databases_not_empty,
+}
+
+TABLE_DETAILS_CHECKS = {
+    "structure": check_table_details_structure,
+}
+
+TABLE_RELATIONSHIPS_CHECKS = {
+    "structure": check_table_relationships_structure,
+}
+
+# Endpoint-specific contract checks, keyed by endpoint name
+CONTRACTS = {
+    "databases": DATABASES_CHECKS,
+    "table_details": TABLE_DETAILS_CHECKS,
+    "table_relationships": TABLE_RELATIONSHIPS_CHECKS,
+}
 
 
 @pytest.mark.integration
 @pytest.mark.clean_api
 class TestCleanAPITableDetails:
     """Tests for GET /api/table/:database/:table endpoint"""
-    
-    def test_get_table_details_returns_200(
-        self, api_base_url, api_client, test_database, test_table, verify_api_available
-    ):
-        """Test that GET /api/table/:database/:table returns 200 OK"""
-        response = api_client.get(f"{api_base_url}/api/table/{test_database}/{test_table}")
-        assert response.status_code == 200
-    
-    def test_get_table_details_returns_json(
-        self, api_base_url, api_client, test_database, test_table, verify_api_available
-    ):
-        """Test that table details returns valid JSON"""
-        response = api_client.get(f"{api_base_url}/api/table/{test_database}/{test_table}")
-        assert response.headers["Content-Type"].startswith("application/json")
-        data = response.json()
-        assert isinstance(data, dict)
-    
-    def test_get_table_details_structure(
-        self, api_base_url, api_client, test_database, test_table, verify_api_available
-    ):
-        """Test that table details have correct structure with metadata and columns"""
-        response = api_client.get(f"{api_base_url}/api/table/{test_database}/{test_table}")
-        data = response.json()
-        
-        # Should be a dict with table metadata
-        assert isinstance(data, dict)
-        
-        # Required fields
-        assert "name" in data
-        assert "database" in data
-        assert "engine" in data
-        assert "columns" in data
-        
-        # Validate metadata fields
-        assert isinstance(data["name"], str)
-        assert isinstance(data["database"], str)
-        assert isinstance(data["engine"], str)
-        
-        # Validate columns array
-        assert isinstance(data["columns"], list)
-        assert len(data["columns"]) > 0, "Expected at least one column"
-        
-        for column in data["columns"]:
-            assert isinstance(column, dict)
-            assert "name" in column
-            assert "type" in column
-            assert isinstance(column["name"], str)
-            assert isinstance(column["type"], str)
-    
-    def test_get_table_details_missing_database_returns_400(
-        self, api_base_url, api_client, test_table, verify_api_available
-    ):
-        """Test that missing database parameter returns 400"""
-        response = api_client.get(f"{api_base_url}/api/table//{test_table}")
-        assert response.status_code == 400  # API returns 400 for missing required parameters
-    
-    def test_get_table_details_missing_table_returns_400(
-        self, api_base_url, api_client, test_database, verify_api_available
-    ):
-        """Test that missing table parameter returns 400"""
-        response = api_client.get(f"{api_base_url}/api/table/{test_database}/")
-        assert response.status_code in [400, 404, 301]  # Different routers handle this differently
-    
-    def test_get_table_details_nonexistent_table_returns_error(
-        self, api_base_url, api_client, test_database, verify_api_available
-    ):
-        """Test that nonexistent table returns error"""
-        response = api_client.get(
-            f"{api_base_url}/api/table/{test_database}/nonexistent_table_xyz_12345"
-        )
-        # Nonexistent table should return 500 error
-        assert response.status_code == 500
-        data = response.json()
+
+    def test_get_table_details_nonexistent_table_returns_error(self, prefetched_responses):
+        """Test that nonexistent table returns an error body"""
+        # Nonexistent table returns 500 (asserted in test_status)
+        _, data = prefetched_responses.parsed("table_details_nonexistent")
         assert "error" in data
 
 
 @pytest.mark.integration
 @pytest.mark.clean_api
-class TestCleanAPITableRelationships:
-    """Tests for GET /api/table/:database/:table/relationships endpoint"""
-    
-    def test_get_table_relationships_returns_200(
-        self, api_base_url, api_client, test_database, test_table, verify_api_available
-    ):
-        """Test that GET /api/table/:database/:table/relationships returns 200 OK"""
-        response = api_client.get(
-            f"{api_base_url}/api/table/{test_database}/{test_table}/relationships"
-        )
-        assert response.status_code == 200
-    
-    def test_get_table_relationships_returns_json(
-        self, api_base_url, api_client, test_database, test_table, verify_api_available
-    ):
-        """Test that relationships return valid JSON"""
-        response = api_client.get(
-            f"{api_base_url}/api/table/{test_database}/{test_table}/relationships"
-        )
-        assert response.headers["Content-Type"].startswith("application/json")
-        data = response.json()
-        assert isinstance(data, list)
-    
-    def test_get_table_relationships_structure(
-        self, api_base_url, api_client, test_database, test_table, verify_api_available
-    ):
-        """Test that relationships have correct structure"""
-        response = api_client.get(
-            f"{api_base_url}/api/table/{test_database}/{test_table}/relationships"
-        )
-        data = response.json()
-        
-        assert isinstance(data, list)
-        
-        for relationship in data:
-            assert isinstance(relationship, dict)
-            assert "source_table" in relationship
-            assert "source_database" in relationship
-            assert "target_table" in relationship
-            assert "target_database" in relationship
-            assert "relationship_type" in relationship
-            
-            assert isinstance(relationship["source_table"], str)
-            assert isinstance(relationship["source_database"], str)
-            assert isinstance(relationship["target_table"], str)
-            assert isinstance(relationship["target_database"], str)
-            assert isinstance(relationship["relationship_type"], str)
-            
-            # Relationship type should be one of the expected values
-            assert relationship["relationship_type"] in [
-                "depends_on", "depended_on_by"
-            ]
-    
-    def test_get_table_relationships_missing_params_returns_400(
-        self, api_base_url, api_client, verify_api_available
-    ):
-        """Test that missing parameters return 400 or 404"""
-        response = api_client.get(f"{api_base_url}/api/table//relationships")
-        assert response.status_code in [400, 404]
+@pytest.mark.parametrize("endpoint,checks,check", [
+    pytest.param(endpoint, checks, check, id=f"{endpoint}-{check}")
+    for endpoint, checks in CONTRACTS.items()
+    for check in ["content_type", *checks]
+])
+def test_contract(prefetched_responses, check_json_content_type, endpoint, checks, check):
+    """Test that each clean API endpoint satisfies the API.md contract"""
+    checks = {"content_type": check_json_content_type, **checks}
+    checks[check](*prefetched_responses.parsed(endpoint))
+
+
+@pytest.mark.integration
+@pytest.mark.clean_api
+@pytest.mark.parametrize("endpoint,expected", [
+    ("databases", {200}),
+    ("table_details", {200}),
+    ("table_details_missing_database", {400}),  # API returns 400 for missing required parameters
+    ("table_details_missing_table", {400, 404, 301}),  # Different routers handle this differently
+    ("table_details_nonexistent", {500}),
+    ("table_relationships", {200}),
+    ("table_relationships_missing_params", {400, 404}),
+])
+def test_status(prefetched_responses, endpoint, expected):
+    """Test that each clean API endpoint returns the expected status code"""
+    assert prefetched_responses[endpoint].status_code in expected